@@ -11,13 +11,17 @@ def create_app():
     load_dotenv()
     
     app = Flask(__name__)
+
+    # Serialize ObjectId / datetime / Decimal128 natively in jsonify
+    from app.json_provider import BSONJSONProvider
+    app.json = BSONJSONProvider(app)
     
     # Configure CORS
     CORS(app, 
          supports_credentials=True, origins= ["http://localhost:5173", "http://127.0.0.1:5173"],
                 
          allow_headers=["Content-Type", "Authorization", "Access-Control-Allow-Origin"],
-         expose_headers=["Authorization"],
+         expose_headers=["Authorization", "Retry-After"],
          allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
     
 
@@ -45,6 +49,53 @@ def create_app():
         print("Unexpected error:", e)
         raise
 
+    # Rate limiting: 'memory' (per worker) or 'redis' (shared across workers)
+    from app.services.rate_limit import create_backend
+    app.rate_limiter = create_backend(
+        os.getenv('RATE_LIMIT_BACKEND', 'memory'),
+        os.getenv('REDIS_URL')
+    )
+    # Per-IP limits stay generous: offices and campuses share one address
+    app.config['RESPONSE_RATE_LIMIT_IP'] = int(os.getenv('RESPONSE_RATE_LIMIT_IP', '120'))
+    app.config['RESPONSE_RATE_LIMIT_USER'] = int(os.getenv('RESPONSE_RATE_LIMIT_USER', '10'))
+    app.config['RESPONSE_RATE_LIMIT_SURVEY'] = int(os.getenv('RESPONSE_RATE_LIMIT_SURVEY', '600'))
+    app.config['LOGIN_RATE_LIMIT_IP'] = int(os.getenv('LOGIN_RATE_LIMIT_IP', '30'))
+
+    # Duplicate response detection
+    from app.services.dedup import ResponseDeduplicator
+    app.response_dedup = ResponseDeduplicator(app.db, app.config['JWT_SECRET_KEY'])
+
+    # Live results feed
+    from app.services.live_results import ResultsBroker
+    app.results_broker = ResultsBroker(
+        app.db,
+        min_interval=float(os.getenv('LIVE_RESULTS_INTERVAL', '1.0')),
+        use_change_streams=os.getenv('LIVE_RESULTS_CHANGE_STREAMS', 'false').lower() == 'true'
+    )
+
+    # Per-survey dashboard counters
+    from app.services.summaries import SurveySummaries
+    app.survey_summaries = SurveySummaries(app.db)
+
+    @app.cli.command('rebuild-summaries')
+    def rebuild_summaries_command():
+        """Recompute dashboard summaries from the survey documents"""
+        count = app.survey_summaries.rebuild()
+        print(f"Rebuilt {count} survey summaries")
+
+    # Cold storage for responses of expired surveys
+    from app.services.archive import ResponseArchiver
+    # Relative paths resolve against the instance folder, not the working directory
+    app.response_archiver = ResponseArchiver(
+        app.db, os.path.join(app.instance_path, os.getenv('ARCHIVE_DIR', 'archive'))
+    )
+
+    @app.cli.command('archive-expired')
+    def archive_expired_command():
+        """Move responses of expired surveys to the archive"""
+        count = app.response_archiver.archive_expired()
+        print(f"Archived responses of {count} expired surveys")
+
     # Register blueprints
     from app.routes import survey_routes, auth_routes
     app.register_blueprint(survey_routes.bp)
@@ -3,8 +3,23 @@ from typing import List, Optional, Dict, Any
 from bson import ObjectId
 from flask import current_app
 from statistics import mean
+from ..json_provider import dumps, loads
+from ..services.branching import compile_survey, answer_map, is_answered
+
+
+def _default_settings() -> Dict[str, Any]:
+    return {
+        'allow_anonymous': True,
+        'collect_email': False,
+        'one_response_per_ip': True,
+        'show_results': True,
+        'custom_thank_you': 'Thank you for completing the survey!'
+    }
+
 
 class Question:
+    __slots__ = ('id', 'type', 'text', 'options', 'required', 'order', 'branch_logic')
+
     def __init__(self, question_type: str, text: str, options: List[str] = None, 
                 required: bool = False, order: int = 0):
         self.id = str(ObjectId())
@@ -26,20 +41,46 @@ class Question:
             'branch_logic': self.branch_logic
         }
 
+    def to_json(self) -> bytes:
+        return dumps(self.to_dict())
+
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> 'Question':
-        question = Question(
-            question_type=data['type'],
-            text=data['text'],
-            options=data.get('options'),
-            required=data.get('required', False),
-            order=data.get('order', 0)
-        )
-        question.id = data.get('id', str(ObjectId()))
-        question.branch_logic = data.get('branch_logic', {})
+        # Bypass __init__ so no ObjectId is generated only to be overwritten
+        question = Question.__new__(Question)
+        question.id = data.get('id') or str(ObjectId())
+        question.type = data['type']
+        question.text = data['text']
+        question.options = data.get('options')
+        question.required = data.get('required', False)
+        question.order = data.get('order', 0)
+        question.branch_logic = data.get('branch_logic') or data.get('branchLogic') or {}
         return question
 
+    @staticmethod
+    def clone_all(questions: List[Dict[str, Any]]) -> List['Question']:
+        """Copy a question schema with fresh ids, keeping branch logic pointed
+        at the copied questions"""
+        id_map = {}
+        clones = []
+        for data in questions:
+            new_id = str(ObjectId())
+            # Older templates may key questions by '_id' or carry no id at all
+            old_id = data.get('id') or data.get('_id')
+            if old_id:
+                id_map[str(old_id)] = new_id
+            clones.append(Question.from_dict(dict(data, id=new_id)))
+        for question in clones:
+            target = question.branch_logic.get('showQuestionId')
+            if target in id_map:
+                question.branch_logic = dict(question.branch_logic, showQuestionId=id_map[target])
+        return clones
+
 class Survey:
+    __slots__ = ('id', 'title', 'description', 'creator_id', 'questions', 'created_at',
+                 'updated_at', 'expires_at', 'is_public', 'shareable_link', 'responses',
+                 'collaborators', 'settings')
+
     def __init__(self, title: str, description: str, creator_id: str):
         self.id = str(ObjectId())
         self.title = title
@@ -47,19 +88,13 @@ class Survey:
         self.creator_id = creator_id
         self.questions: List[Question] = []
         self.created_at = datetime.utcnow()
-        self.updated_at = datetime.utcnow()
+        self.updated_at = self.created_at
         self.expires_at: Optional[datetime] = None
         self.is_public = True
         self.shareable_link = str(ObjectId())
         self.responses = []
         self.collaborators = []
-        self.settings = {
-            'allow_anonymous': True,
-            'collect_email': False,
-            'one_response_per_ip': True,
-            'show_results': True,
-            'custom_thank_you': 'Thank you for completing the survey!'
-        }
+        self.settings = _default_settings()
 
     def add_question(self, question: Question) -> None:
         question.order = len(self.questions)
@@ -88,29 +123,41 @@ class Survey:
             'settings': self.settings
         }
 
+    def to_json(self) -> bytes:
+        """Serialize straight to JSON bytes (ObjectIds as strings, ISO dates)"""
+        return dumps(self.to_dict())
+
     @staticmethod
     def from_dict(data: Dict[str, Any]) -> 'Survey':
-        survey = Survey(
-            title=data['title'],
-            description=data['description'],
-            creator_id=data['creator_id']
-        )
-        survey.id = data.get('id', str(ObjectId()))
+        # Bypass __init__: defaults are only built for fields that are missing
+        survey = Survey.__new__(Survey)
+        survey.id = data.get('id') or str(ObjectId())
+        survey.title = data['title']
+        survey.description = data['description']
+        survey.creator_id = data['creator_id']
         survey.questions = [Question.from_dict(q) for q in data.get('questions', [])]
-        survey.created_at = data.get('created_at', datetime.utcnow())
-        survey.updated_at = data.get('updated_at', datetime.utcnow())
+        survey.created_at = data.get('created_at') or datetime.utcnow()
+        survey.updated_at = data.get('updated_at') or survey.created_at
         survey.expires_at = data.get('expires_at')
         survey.is_public = data.get('is_public', True)
-        survey.shareable_link = data.get('shareable_link', str(ObjectId()))
+        survey.shareable_link = data.get('shareable_link') or str(ObjectId())
         survey.responses = data.get('responses', [])
         survey.collaborators = data.get('collaborators', [])
-        survey.settings = data.get('settings', {
-            'allow_anonymous': True,
-            'collect_email': False,
-            'one_response_per_ip': True,
-            'show_results': True,
-            'custom_thank_you': 'Thank you for completing the survey!'
-        })
+        settings = data.get('settings')
+        survey.settings = settings if settings is not None else _default_settings()
+        return survey
+
+    @staticmethod
+    def from_source(source: Dict[str, Any], creator_id: str, title: Optional[str] = None) -> 'Survey':
+        """Start a new survey from the question schema and settings of a
+        template or an existing survey (responses are never copied)"""
+        survey = Survey(
+            title=title or f"{source['title']} (Copy)",
+            description=source.get('description', ''),
+            creator_id=creator_id
+        )
+        survey.questions = Question.clone_all(source.get('questions', []))
+        survey.settings.update(source.get('settings') or {})
         return survey
 
     @staticmethod
@@ -118,7 +165,7 @@ class Survey:
         """Get all available survey templates"""
         templates = current_app.db.survey_templates.find({})
         return [{
-            '_id': str(template['_id']),
+            '_id': template['_id'],
             'title': template['title'],
             'description': template['description'],
             'category': template.get('category'),
@@ -134,29 +181,43 @@ class Survey:
         if not survey:
             return None
 
+        archive = survey.get('archive')
+        if archive:
+            # Responses of archived surveys live in cold storage; serve the summary
+            if not survey.get('responses'):
+                return archive['analytics']
+            # Expiry was extended and new responses arrived: include the archive
+            archived = [loads(line) for line in current_app.response_archiver.iter_responses(survey)]
+            analytics = Survey.compute_analytics(dict(survey, responses=archived + survey['responses']))
+            analytics['responses'] = analytics['responses'][len(archived):]
+            return analytics
+
+        return Survey.compute_analytics(survey)
+
+    @staticmethod
+    def compute_analytics(survey: Dict[str, Any]) -> Dict[str, Any]:
+        """Compute analytics from a survey document and its embedded responses"""
         responses = survey.get('responses', [])
         total_responses = len(responses)
         
-        # Calculate completion rate
-        completed_responses = sum(1 for r in responses if all(
-            q.get('answer') is not None 
-            for q in r.get('answers', [])
-        ))
+        answer_maps = [answer_map(r) for r in responses]
+
+        # A response is complete when every question its branch logic shows is answered
+        graph = compile_survey(survey)
+        completed_responses = sum(1 for answers in answer_maps if graph.is_complete(answers))
         completion_rate = completed_responses / total_responses if total_responses > 0 else 0
 
         # Analyze each question
         question_analytics = []
         for question in survey['questions']:
             q_type = question['type']
-            q_id = str(question['_id'])
+            q_id = question['id']
             
             # Get all answers for this question
             answers = [
-                r['answers'][q_id]['answer']
-                for r in responses
-                if 'answers' in r 
-                and q_id in r['answers']
-                and r['answers'][q_id].get('answer') is not None
+                by_question[q_id]
+                for by_question in answer_maps
+                if is_answered(by_question.get(q_id))
             ]
             
             analytics = {
@@ -9,11 +9,13 @@ import secrets
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 from flask_cors import cross_origin
+from ..services.rate_limit import rate_limit
 
 bp = Blueprint('auth', __name__)
 
 @bp.route('/api/auth/register', methods=['POST'])
 @cross_origin(supports_credentials=True)
+@rate_limit(10, period=3600, scope='ip')
 def register():
     data = request.json
     
@@ -49,6 +51,7 @@ def register():
 
 @bp.route('/api/auth/login', methods=['POST'])
 @cross_origin(supports_credentials=True)
+@rate_limit('LOGIN_RATE_LIMIT_IP', period=60, scope='ip')
 def login():
     data = request.json
     
@@ -103,6 +106,7 @@ def verify_email(token):
 
 @bp.route('/api/auth/forgot-password', methods=['POST'])
 @cross_origin(supports_credentials=True)
+@rate_limit(5, period=900, scope='ip')
 def forgot_password():
     data = request.json
     if 'email' not in data:
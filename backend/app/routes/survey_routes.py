@@ -1,12 +1,22 @@
-from flask import Blueprint, jsonify, request, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt, verify_jwt_in_request
 from bson import ObjectId
 from datetime import datetime
 from ..models.survey import Survey, Question
+from ..services.live_results import format_sse
+from ..services.branching import compile_survey, answer_map
+from ..services.rate_limit import rate_limit, concurrency_limit, check_limit
+from ..services.dedup import TOKEN_COOKIE
+from ..services.bulk import ACTIONS, access_filter, build_query, start_bulk
+from ..json_provider import dumps
+import queue
 from flask_cors import cross_origin
 
 bp = Blueprint('surveys', __name__)
 
+# Listings never ship responses; counts come from the survey summaries
+LISTING_PROJECTION = {'responses': 0, 'archive': 0}
+
 def check_survey_access(survey, user_id, required_role=None):
     if not survey:
         return False, 'Survey not found', 404
@@ -40,13 +50,15 @@ def get_surveys():
                 {'collaborators': user_id},
                 {'is_public': True}
             ]
-        }))
+        }, LISTING_PROJECTION))
     else:
         # If not authenticated, only show public surveys
-        surveys = list(current_app.db.surveys.find({'is_public': True}))
-    
+        surveys = list(current_app.db.surveys.find({'is_public': True}, LISTING_PROJECTION))
+
+    # Every listed survey keeps its response count, read from the summaries
+    counts = current_app.survey_summaries.counts([survey['_id'] for survey in surveys])
     for survey in surveys:
-        survey['_id'] = str(survey['_id'])
+        survey['response_count'] = counts.get(survey['_id'], 0)
     
     return jsonify(surveys)
 
@@ -67,14 +79,8 @@ def create_survey():
         creator_id=user_id
     )
     
-    # Add questions
-    for q_data in survey_data.get('questions', []):
-        question = Question(
-            question_type=q_data['type'],
-            text=q_data['text'],
-            options=q_data.get('options'),
-            required=q_data.get('required', False)
-        )
+    # Add questions; client-side ids are replaced, so branch logic is remapped too
+    for question in Question.clone_all(survey_data.get('questions', [])):
         survey.add_question(question)
     
     # Set survey settings
@@ -85,14 +91,19 @@ def create_survey():
     if 'expires_at' in survey_data:
         survey.expires_at = datetime.fromisoformat(survey_data['expires_at'])
     
-    result = current_app.db.surveys.insert_one(survey.to_dict())
+    survey_doc = survey.to_dict()
+    result = current_app.db.surveys.insert_one(survey_doc)
+    current_app.survey_summaries.upsert_survey(result.inserted_id, survey_doc)
     return jsonify({'_id': str(result.inserted_id)}), 201
 
 @bp.route('/api/surveys/<survey_id>', methods=['GET'])
 @jwt_required()  # This is the important addition
 @cross_origin(supports_credentials=True)
 def get_survey(survey_id):
-    survey = current_app.db.surveys.find_one({'_id': ObjectId(survey_id)})
+    survey = current_app.db.surveys.find_one(
+        {'_id': ObjectId(survey_id)},
+        {'archive.fingerprints': 0, 'archive.ip_addresses': 0}
+    )
     if not survey:
         return jsonify({'error': 'Survey not found'}), 404
 
@@ -102,7 +113,6 @@ def get_survey(survey_id):
     if not has_access:
         return jsonify({'error': error_msg}), status_code
 
-    survey['_id'] = str(survey['_id'])
     return jsonify(survey)
 
 @bp.route('/api/surveys/<survey_id>', methods=['PUT'])
@@ -140,15 +150,20 @@ def update_survey(survey_id):
     if 'collaborators' in update_data:
         survey_obj.collaborators = update_data['collaborators']
 
+    survey_doc = survey_obj.to_dict()
     current_app.db.surveys.update_one(
         {'_id': ObjectId(survey_id)},
-        {'$set': survey_obj.to_dict()}
+        {'$set': survey_doc}
     )
+    current_app.survey_summaries.upsert_survey(ObjectId(survey_id), survey_doc)
     
     return jsonify({'message': 'Survey updated successfully'})
 
 @bp.route('/api/surveys/<survey_id>/respond', methods=['POST'])
 @cross_origin(supports_credentials=True)
+@rate_limit('RESPONSE_RATE_LIMIT_IP', period=60, scope='ip')
+@rate_limit('RESPONSE_RATE_LIMIT_USER', period=60, scope='user')
+@rate_limit('RESPONSE_RATE_LIMIT_SURVEY', period=60, scope='survey')
 def submit_response(survey_id):
     survey = current_app.db.surveys.find_one({'_id': ObjectId(survey_id)})
     if not survey:
@@ -161,41 +176,68 @@ def submit_response(survey_id):
     response_data = request.json
     response_data['submitted_at'] = datetime.utcnow()
     
-    # Add IP address if one response per IP is enabled
-    if survey['settings'].get('one_response_per_ip'):
-        ip_address = request.remote_addr
-        existing_response = current_app.db.surveys.find_one({
-            '_id': ObjectId(survey_id),
-            'responses.ip_address': ip_address
-        })
-        if existing_response:
-            return jsonify({'error': 'Already submitted response from this IP'}), 400
-        response_data['ip_address'] = ip_address
-    
-    # Validate required questions
-    for question in survey['questions']:
-        if question['required']:
-            answered = False
-            for answer in response_data['answers']:
-                if answer['questionId'] == question['id']:
-                    answered = True
-                    break
-            if not answered:
-                return jsonify({'error': f'Question "{question["text"]}" is required'}), 400
-    
+    # Reject repeat submissions according to the survey's fingerprint strategy
+    dedup = current_app.response_dedup
+    try:
+        fingerprints = dedup.fingerprints(survey)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if dedup.is_duplicate(survey, fingerprints):
+        return jsonify({'error': 'You have already responded to this survey'}), 400
+    if fingerprints:
+        response_data['fingerprints'] = fingerprints
+    
+    # Validate required questions, skipping those hidden by branch logic
+    graph = compile_survey(survey)
+    answers = answer_map(response_data)
+    missing = graph.missing_required(answers)
+    if missing:
+        return jsonify({'error': f'Question "{missing[0]["text"]}" is required'}), 400
+    
+    # Only push if no response with these fingerprints landed in the meantime
     result = current_app.db.surveys.update_one(
-        {'_id': ObjectId(survey_id)},
+        dedup.unseen_filter(survey, fingerprints),
         {'$push': {'responses': response_data}}
     )
     
     if result.modified_count == 0:
+        if fingerprints:
+            dedup.record(survey_id, fingerprints)
+            return jsonify({'error': 'You have already responded to this survey'}), 400
         return jsonify({'error': 'Failed to submit response'}), 500
+
+    dedup.record(survey_id, fingerprints)
+
+    current_app.survey_summaries.record_response(
+        survey['_id'], graph.is_complete(answers), response_data['submitted_at']
+    )
+    current_app.results_broker.publish(survey_id, response_data)
         
     return jsonify({
         'message': 'Response submitted successfully',
         'thank_you_message': survey['settings'].get('custom_thank_you', 'Thank you for completing the survey!')
     }), 200
 
+@bp.route('/api/surveys/<survey_id>/respondent-token', methods=['GET'])
+@cross_origin(supports_credentials=True)
+def get_respondent_token(survey_id):
+    """Set a signed anonymous respondent cookie for surveys deduplicated by 'token'"""
+    dedup = current_app.response_dedup
+    if dedup.has_token():
+        return jsonify({'issued': False})
+
+    # Only new identities count, so NATed offices reloading a survey are fine
+    limited = check_limit('respondent_token', 20, period=86400, scope='ip')
+    if limited is not None:
+        return limited
+
+    response = jsonify({'issued': True})
+    response.set_cookie(
+        TOKEN_COOKIE, dedup.issue_token(),
+        max_age=365 * 24 * 3600, httponly=True, samesite='Lax', secure=request.is_secure
+    )
+    return response
+
 @bp.route('/api/surveys/<survey_id>/results', methods=['GET'])
 @jwt_required()
 @cross_origin(supports_credentials=True)
@@ -212,12 +254,80 @@ def get_survey_results(survey_id):
         return jsonify({'error': 'Results are not public'}), 403
     
     responses = survey.get('responses', [])
+    archived_count = survey.get('archive', {}).get('count', 0)
     
     return jsonify({
-        'total_responses': len(responses),
+        'total_responses': len(responses) + archived_count,
+        'archived_responses': archived_count,
         'responses': responses
     })
 
+@bp.route('/api/surveys/<survey_id>/archive', methods=['GET'])
+@jwt_required()
+@cross_origin(supports_credentials=True)
+def get_archived_responses(survey_id):
+    """Stream archived responses back as newline-delimited JSON"""
+    user_id = get_jwt_identity()
+    survey = current_app.db.surveys.find_one(
+        {'_id': ObjectId(survey_id)},
+        {'responses': 0}
+    )
+
+    has_access, error_msg, status_code = check_survey_access(survey, user_id, required_role='creator')
+    if not has_access:
+        return jsonify({'error': error_msg}), status_code
+
+    if not survey.get('archive'):
+        return jsonify({'error': 'Survey has no archived responses'}), 404
+
+    return Response(
+        stream_with_context(current_app.response_archiver.iter_responses(survey)),
+        mimetype='application/x-ndjson'
+    )
+
+@bp.route('/api/surveys/<survey_id>/live', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+@cross_origin(supports_credentials=True)
+def stream_survey_results(survey_id):
+    """Stream live result counters as server-sent events.
+
+    Browsers' EventSource cannot set an Authorization header, so the token
+    is also accepted as ``?jwt=<token>``.
+    """
+    user_id = get_jwt_identity()
+    survey = current_app.db.surveys.find_one(
+        {'_id': ObjectId(survey_id)},
+        {'creator_id': 1, 'collaborators': 1, 'is_public': 1}
+    )
+
+    has_access, error_msg, status_code = check_survey_access(survey, user_id, required_role='creator')
+    if not has_access:
+        return jsonify({'error': error_msg}), status_code
+
+    broker = current_app.results_broker
+    messages = broker.subscribe(survey_id)
+    if messages is None:
+        return jsonify({'error': 'Survey not found'}), 404
+
+    def generate():
+        try:
+            while True:
+                try:
+                    event, data = messages.get(timeout=15)
+                except queue.Empty:
+                    # Keep proxies from closing an idle connection
+                    yield ': keep-alive\n\n'
+                    continue
+                yield format_sse(event, data)
+        finally:
+            broker.unsubscribe(survey_id, messages)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @bp.route('/api/surveys/<survey_id>/collaborators', methods=['POST'])
 @jwt_required()
 @cross_origin(supports_credentials=True)
@@ -255,14 +365,71 @@ def delete_survey(survey_id):
         return jsonify({'error': 'Unauthorized'}), 403
     
     current_app.db.surveys.delete_one({'_id': ObjectId(survey_id)})
+    current_app.survey_summaries.remove([ObjectId(survey_id)])
+    current_app.response_dedup.forget([ObjectId(survey_id)])
+    current_app.response_archiver.remove([ObjectId(survey_id)])
     return jsonify({'message': 'Survey deleted successfully'})
 
+@bp.route('/api/me/dashboard', methods=['GET'])
+@jwt_required()
+@cross_origin(supports_credentials=True)
+def get_dashboard():
+    """Summaries of the current user's surveys for the dashboard"""
+    user_id = get_jwt_identity()
+    return jsonify(current_app.survey_summaries.for_creator(user_id))
+
+@bp.route('/api/surveys/bulk/<action>', methods=['POST'])
+@jwt_required()
+@cross_origin(supports_credentials=True)
+def bulk_survey_action(action):
+    """Delete, expire or transfer many surveys, streaming NDJSON progress.
+
+    Pass the last reported ``next_id`` as ``resume_from`` to continue a run
+    that stopped early.
+    """
+    user_id = get_jwt_identity()
+    claims = get_jwt()
+
+    if claims.get('role') not in ['creator', 'admin']:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    if action not in ACTIONS:
+        return jsonify({'error': f'Unknown bulk action: {action}'}), 404
+
+    data = request.get_json(silent=True) or {}
+    params = {}
+    try:
+        query = build_query(data, access_filter(action, user_id, claims.get('role')))
+        if action == 'expire' and data.get('expires_at'):
+            params['expires_at'] = datetime.fromisoformat(data['expires_at'])
+        chunk_size = max(1, min(int(data.get('chunk_size', 500)), 1000))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    if action == 'transfer':
+        if not data.get('new_owner_id'):
+            return jsonify({'error': 'new_owner_id is required'}), 400
+        params['new_owner_id'] = str(data['new_owner_id'])
+
+    # Runs to completion even if the client stops reading the progress stream
+    progress = start_bulk(
+        current_app.db, current_app.survey_summaries, current_app.response_dedup,
+        current_app.response_archiver, action, query, params, chunk_size
+    )
+
+    def generate():
+        while True:
+            record = progress.get()
+            yield dumps(record) + b'\n'
+            if record.get('done') or record.get('error'):
+                break
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @bp.route('/api/surveys/templates', methods=['GET'])
 @cross_origin(supports_credentials=True)
 def get_survey_templates():
     templates = list(current_app.db.survey_templates.find({}))
-    for template in templates:
-        template['_id'] = str(template['_id'])
     return jsonify(templates)
 
 @bp.route('/templates', methods=['GET'])
@@ -277,36 +444,68 @@ def get_templates():
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/templates/<template_id>/use', methods=['POST'])
+@bp.route('/api/surveys/templates/<template_id>/use', methods=['POST'])
 @jwt_required()
 @cross_origin(supports_credentials=True)
 def use_template(template_id):
     """Create a new survey from a template"""
     try:
         user_id = get_jwt_identity()
-        template = Survey.get_by_id(template_id)
+        claims = get_jwt()
+
+        if claims.get('role') not in ['creator', 'admin']:
+            return jsonify({'error': 'Unauthorized'}), 403
+
+        # Bump popularity and fetch the schema in one round trip
+        template = current_app.db.survey_templates.find_one_and_update(
+            {'_id': ObjectId(template_id)},
+            {'$inc': {'popularity': 1}},
+            projection={'title': 1, 'description': 1, 'questions': 1, 'settings': 1}
+        )
         
         if not template:
             return jsonify({'error': 'Template not found'}), 404
             
-        # Create new survey from template
-        new_survey = {
-            'title': f"{template['title']} (Copy)",
-            'description': template['description'],
-            'questions': template['questions'],
-            'creator_id': user_id,
-            'created_at': datetime.datetime.utcnow(),
-            'settings': template.get('settings', {})
-        }
-        
-        survey_id = Survey.create(new_survey)
-        return jsonify({'_id': str(survey_id)}), 201
+        survey = Survey.from_source(template, creator_id=user_id)
+        survey_doc = survey.to_dict()
+        result = current_app.db.surveys.insert_one(survey_doc)
+        current_app.survey_summaries.upsert_survey(result.inserted_id, survey_doc)
+        return jsonify({'_id': str(result.inserted_id)}), 201
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/api/surveys/<survey_id>/clone', methods=['POST'])
+@jwt_required()
+@cross_origin(supports_credentials=True)
+def clone_survey(survey_id):
+    """Copy a survey's questions and settings into a new survey"""
+    user_id = get_jwt_identity()
+    claims = get_jwt()
+
+    if claims.get('role') not in ['creator', 'admin']:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    source = current_app.db.surveys.find_one(
+        {'_id': ObjectId(survey_id)},
+        {'title': 1, 'description': 1, 'questions': 1, 'settings': 1,
+         'creator_id': 1, 'collaborators': 1, 'is_public': 1}
+    )
+
+    has_access, error_msg, status_code = check_survey_access(source, user_id, required_role='creator')
+    if not has_access:
+        return jsonify({'error': error_msg}), status_code
+
+    survey = Survey.from_source(source, creator_id=user_id, title=(request.get_json(silent=True) or {}).get('title'))
+    survey_doc = survey.to_dict()
+    result = current_app.db.surveys.insert_one(survey_doc)
+    current_app.survey_summaries.upsert_survey(result.inserted_id, survey_doc)
+    return jsonify({'_id': str(result.inserted_id)}), 201
+
 @bp.route('/results/<survey_id>/analytics', methods=['GET'])
 @jwt_required()
 @cross_origin(supports_credentials=True)
+@concurrency_limit(4)
 def get_survey_analytics(survey_id):
     """Get enhanced analytics for a survey"""
     try:
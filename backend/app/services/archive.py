@@ -0,0 +1,123 @@
+import gzip
+import os
+import shutil
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from ..json_provider import dumps, loads
+from ..models.survey import Survey
+
+
+class ResponseArchiver:
+    """Moves the responses of expired surveys to compressed files on disk.
+
+    Each run writes one gzip'd NDJSON file per expired survey under
+    ``archive_dir/<survey_id>/`` and empties the survey's embedded
+    ``responses``. The survey document itself stays in the hot collection
+    with an ``archive`` entry holding the file list, the archived response
+    count, a precomputed analytics summary and the archived respondents'
+    fingerprints, so listings, analytics and duplicate checks never need
+    to touch the cold tier.
+    """
+
+    def __init__(self, db, archive_dir: str):
+        self.db = db
+        self.archive_dir = archive_dir
+        db.surveys.create_index('expires_at', sparse=True)
+
+    def _survey_dir(self, survey_id: str) -> str:
+        return os.path.join(self.archive_dir, survey_id)
+
+    def archive_expired(self, now: Optional[datetime] = None) -> int:
+        """Archive every expired survey that still holds responses.
+
+        Returns the number of surveys archived.
+        """
+        now = now or datetime.utcnow()
+        archived = 0
+        expired = self.db.surveys.find({
+            'expires_at': {'$lt': now},
+            'responses.0': {'$exists': True}
+        })
+        for survey in expired:
+            survey_id = str(survey['_id'])
+            responses = survey['responses']
+            # The summary covers earlier archive batches too (expiry may have been extended)
+            previous = [loads(line) for line in self.iter_responses(survey)]
+            analytics = Survey.compute_analytics(dict(survey, responses=previous + responses))
+            analytics['responses'] = []
+            submitted = [r['submitted_at'] for r in responses if r.get('submitted_at')]
+            fingerprints = [fp for r in responses for fp in r.get('fingerprints', [])]
+            ip_addresses = [r['ip_address'] for r in responses if r.get('ip_address')]
+
+            os.makedirs(self._survey_dir(survey_id), exist_ok=True)
+            # Unique per run, so concurrent workers never share a file
+            filename = f"{now.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:12]}.ndjson.gz"
+            path = os.path.join(self._survey_dir(survey_id), filename)
+            tmp_path = path + '.tmp'
+            with gzip.open(tmp_path, 'wb') as f:
+                for response in responses:
+                    f.write(dumps(response) + b'\n')
+            os.replace(tmp_path, path)
+
+            update = {
+                '$set': {
+                    'responses': [],
+                    'archive.analytics': analytics,
+                    'archive.archived_at': now
+                },
+                '$inc': {'archive.count': len(responses)},
+                '$push': {'archive.files': filename},
+                # Duplicate checks must still see past respondents if expiry is extended
+                '$addToSet': {
+                    'archive.fingerprints': {'$each': fingerprints},
+                    'archive.ip_addresses': {'$each': ip_addresses}
+                }
+            }
+            if submitted:
+                # Kept so dashboard summaries can be rebuilt after archival
+                update['$max'] = {'archive.last_submission_at': max(submitted)}
+
+            # Only clear the hot copy if no response slipped in meanwhile
+            result = self.db.surveys.update_one(
+                {'_id': survey['_id'], 'responses': {'$size': len(responses)}},
+                update
+            )
+            if result.modified_count:
+                archived += 1
+            else:
+                # Nobody else can have recorded this run's file name
+                os.remove(path)
+        return archived
+
+    def iter_responses(self, survey: Dict[str, Any]) -> Iterator[bytes]:
+        """Stream a survey's archived responses back as NDJSON lines"""
+        survey_dir = self._survey_dir(str(survey['_id']))
+        for filename in survey.get('archive', {}).get('files', []):
+            with gzip.open(os.path.join(survey_dir, filename), 'rb') as f:
+                for line in f:
+                    yield line
+
+    def remove(self, survey_ids: List[Any]) -> None:
+        """Delete the archive files of deleted surveys"""
+        for survey_id in survey_ids:
+            shutil.rmtree(self._survey_dir(str(survey_id)), ignore_errors=True)
+
+    def start(self, interval: float) -> None:
+        """Run ``archive_expired`` every ``interval`` seconds in the background.
+
+        The first run happens one interval after start-up, not at start-up.
+        """
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    count = self.archive_expired()
+                    if count:
+                        print(f"Archived responses of {count} expired surveys")
+                except Exception as e:
+                    print(f"Response archival failed: {e}")
+
+        threading.Thread(target=loop, daemon=True).start()
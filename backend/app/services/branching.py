@@ -0,0 +1,165 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+
+def answer_map(response: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalise a stored response's answers to a {questionId: value} dict"""
+    answers = response.get('answers') or {}
+    if isinstance(answers, dict):
+        return {
+            qid: (ans.get('answer') if isinstance(ans, dict) else ans)
+            for qid, ans in answers.items()
+        }
+    return {
+        ans.get('questionId'): ans.get('value')
+        for ans in answers
+        if isinstance(ans, dict)
+    }
+
+
+def is_answered(value: Any) -> bool:
+    return value is not None and value != '' and value != []
+
+
+def _as_number(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _contains(answer: Any, expected: str) -> bool:
+    if isinstance(answer, list):
+        return expected in [str(a) for a in answer]
+    return expected in str(answer)
+
+
+def _compare(op: Callable[[float, float], bool]) -> Callable[[Any, str], bool]:
+    def check(answer: Any, expected: str) -> bool:
+        a, b = _as_number(answer), _as_number(expected)
+        return a is not None and b is not None and op(a, b)
+    return check
+
+
+CONDITIONS: Dict[str, Callable[[Any, str], bool]] = {
+    'equals': lambda answer, expected: str(answer) == expected,
+    'not_equals': lambda answer, expected: str(answer) != expected,
+    'contains': _contains,
+    'greater_than': _compare(lambda a, b: a > b),
+    'less_than': _compare(lambda a, b: a < b),
+}
+
+
+class QuestionGraph:
+    """A survey's branch logic compiled into a topologically ordered DAG.
+
+    A rule lives on the controlling question, as the survey editor stores
+    it: its ``branch_logic`` names the question it reveals
+    (``showQuestionId``), a ``condition`` and a ``value`` compared against
+    the controlling question's own answer. A question targeted by rules is
+    shown only when at least one of its controlling questions is shown and
+    answered accordingly. Rules with a dangling reference or lying on a
+    cycle are ignored.
+    """
+
+    def __init__(self, questions: List[Dict[str, Any]]):
+        self.questions = {q['id']: q for q in questions if 'id' in q}
+        # target question id -> [(controlling question id, check, expected value)]
+        self._rules: Dict[str, List[Tuple[str, Callable[[Any, str], bool], str]]] = {}
+        children: Dict[str, List[str]] = {qid: [] for qid in self.questions}
+
+        for qid, question in self.questions.items():
+            logic = question.get('branch_logic') or question.get('branchLogic') or {}
+            target = logic.get('showQuestionId')
+            if not target or target == qid or target not in self.questions:
+                continue
+            check = CONDITIONS.get(logic.get('condition'), CONDITIONS['equals'])
+            self._rules.setdefault(target, []).append((qid, check, str(logic.get('value', ''))))
+            children[qid].append(target)
+
+        # A rule sits on a cycle if its target can reach back to its owner
+        def reaches(start: str, goal: str) -> bool:
+            stack, seen = [start], {start}
+            while stack:
+                node = stack.pop()
+                if node == goal:
+                    return True
+                for child in children[node]:
+                    if child not in seen:
+                        seen.add(child)
+                        stack.append(child)
+            return False
+
+        for target, rules in list(self._rules.items()):
+            kept = [rule for rule in rules if not reaches(target, rule[0])]
+            if kept:
+                self._rules[target] = kept
+            else:
+                del self._rules[target]
+        children = {qid: [] for qid in self.questions}
+        for target, rules in self._rules.items():
+            for owner, _, _ in rules:
+                children[owner].append(target)
+
+        # Kahn's algorithm over the remaining, acyclic rules
+        indegree = {qid: len(self._rules.get(qid, ())) for qid in self.questions}
+        ready = [qid for qid, degree in indegree.items() if degree == 0]
+        self.order: List[str] = []
+        while ready:
+            qid = ready.pop()
+            self.order.append(qid)
+            for child in children[qid]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    ready.append(child)
+
+    def visible(self, answers: Dict[str, Any]) -> Set[str]:
+        """Ids of the questions shown for the given {questionId: value} answers"""
+        shown: Set[str] = set()
+        for qid in self.order:
+            rules = self._rules.get(qid)
+            if rules is None or any(
+                owner in shown and is_answered(answers.get(owner)) and check(answers[owner], expected)
+                for owner, check, expected in rules
+            ):
+                shown.add(qid)
+        return shown
+
+    def missing_required(self, answers: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Required questions that are shown but left unanswered"""
+        shown = self.visible(answers)
+        return [
+            question for qid, question in self.questions.items()
+            if question.get('required') and qid in shown and not is_answered(answers.get(qid))
+        ]
+
+    def is_complete(self, answers: Dict[str, Any]) -> bool:
+        """Whether every shown question has an answer"""
+        return all(is_answered(answers.get(qid)) for qid in self.visible(answers))
+
+
+_cache: OrderedDict = OrderedDict()
+_cache_lock = threading.Lock()
+_CACHE_SIZE = 256
+
+
+def compile_survey(survey: Dict[str, Any]) -> QuestionGraph:
+    """Return the survey's question graph, compiled once per revision.
+
+    The revision is the survey's ``updated_at``, which every edit bumps.
+    """
+    if '_id' not in survey:
+        return QuestionGraph(survey.get('questions', []))
+    key = (str(survey['_id']), survey.get('updated_at'))
+    with _cache_lock:
+        graph = _cache.get(key)
+        if graph is not None:
+            _cache.move_to_end(key)
+            return graph
+    graph = QuestionGraph(survey.get('questions', []))
+    with _cache_lock:
+        _cache[key] = graph
+        if len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return graph
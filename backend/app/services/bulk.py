@@ -0,0 +1,156 @@
+import queue
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+from bson import ObjectId
+from pymongo import ASCENDING, DeleteMany, UpdateMany
+from pymongo.errors import PyMongoError
+
+ACTIONS = ('delete', 'expire', 'transfer')
+
+
+def _boolean(value: Any) -> bool:
+    # bool("false") is True, so only real JSON booleans are accepted
+    if not isinstance(value, bool):
+        raise ValueError('expected true or false')
+    return value
+
+
+# Fields a bulk request may filter on, mapped to query builders
+FILTERS = {
+    'creator_id': lambda value: {'creator_id': str(value)},
+    'is_public': lambda value: {'is_public': _boolean(value)},
+    'created_before': lambda value: {'created_at': {'$lt': datetime.fromisoformat(value)}},
+    'expires_before': lambda value: {'expires_at': {'$lt': datetime.fromisoformat(value)}},
+}
+
+
+def access_filter(action: str, user_id: str, role: Optional[str]) -> Dict[str, Any]:
+    """The check_survey_access / delete_survey rules, expressed as a query.
+
+    Admins may act on any survey. Deleting and transferring need the
+    creator; expiring is an edit, which collaborators may also make.
+    """
+    if role == 'admin':
+        return {}
+    if action == 'expire':
+        return {'$or': [{'creator_id': user_id}, {'collaborators': user_id}]}
+    return {'creator_id': user_id}
+
+
+def build_query(data: Dict[str, Any], access: Dict[str, Any]) -> Dict[str, Any]:
+    """Turn a request's ``ids`` list or ``filter`` object into a survey query.
+
+    ``resume_from`` restricts the query to ids from that one on, to pick up
+    an interrupted run at the ``next_id`` it last reported. Raises
+    ValueError on malformed input. Only whitelisted filter fields are
+    accepted, so callers cannot smuggle in arbitrary operators.
+    """
+    clauses: List[Dict[str, Any]] = [access] if access else []
+    if data.get('resume_from'):
+        try:
+            clauses.append({'_id': {'$gte': ObjectId(data['resume_from'])}})
+        except Exception:
+            raise ValueError('Invalid resume_from id')
+    if 'ids' in data:
+        try:
+            clauses.append({'_id': {'$in': [ObjectId(i) for i in data['ids']]}})
+        except Exception:
+            raise ValueError('Invalid survey id')
+    elif isinstance(data.get('filter'), dict) and data['filter']:
+        for field, value in data['filter'].items():
+            if field not in FILTERS:
+                raise ValueError(f'Unsupported filter field: {field}')
+            try:
+                clauses.append(FILTERS[field](value))
+            except (TypeError, ValueError):
+                raise ValueError(f'Invalid value for filter field: {field}')
+    else:
+        raise ValueError('Either ids or a non-empty filter is required')
+    return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+
+def _operation(action: str, survey_filter: Dict[str, Any], params: Dict[str, Any]):
+    if action == 'delete':
+        return DeleteMany(survey_filter)
+    if action == 'expire':
+        return UpdateMany(survey_filter, {'$set': {
+            'expires_at': params['expires_at'], 'updated_at': params['now']
+        }})
+    return UpdateMany(survey_filter, {
+        '$set': {'creator_id': params['new_owner_id'], 'updated_at': params['now']},
+        '$pull': {'collaborators': params['new_owner_id']}
+    })
+
+
+def run_bulk(db, summaries, dedup, archiver, action: str, query: Dict[str, Any],
+             params: Dict[str, Any], chunk_size: int = 500) -> Iterator[Dict[str, Any]]:
+    """Apply ``action`` to every survey matching ``query`` in chunks.
+
+    Matching ids are read once in ``_id`` order, then each chunk is written
+    with a single ``bulk_write``. Yields a progress record after each chunk
+    and a final record with ``done`` set; ``next_id`` is the first survey
+    not yet processed, so a failed or interrupted run can be resumed. Each
+    chunk re-applies ``query`` before writing, so a survey whose ownership
+    changed mid-run is skipped, and summaries, dedup filters and archive
+    files are only touched for the surveys actually matched.
+    """
+    params = dict(params, now=datetime.utcnow())
+    params.setdefault('expires_at', params['now'])
+    processed = modified = 0
+
+    def flush(chunk_ids: List[ObjectId]) -> None:
+        nonlocal modified
+        # Re-check the query so side tables only follow surveys still in scope
+        survey_filter = {'$and': [query, {'_id': {'$in': chunk_ids}}]}
+        ids = [doc['_id'] for doc in db.surveys.find(survey_filter, {'_id': 1})]
+        if not ids:
+            return
+        op = _operation(action, {'$and': [query, {'_id': {'$in': ids}}]}, params)
+        result = db.surveys.bulk_write([op], ordered=False)
+        modified += result.deleted_count if action == 'delete' else result.modified_count
+        if action == 'delete':
+            summaries.remove(ids)
+            dedup.forget(ids)
+            archiver.remove(ids)
+        elif action == 'expire':
+            summaries.update_many(ids, {'expires_at': params['expires_at']})
+        else:
+            summaries.update_many(ids, {'creator_id': params['new_owner_id']})
+
+    ids = [doc['_id'] for doc in db.surveys.find(query, {'_id': 1}).sort('_id', ASCENDING)]
+    total = len(ids)
+    for start in range(0, total, chunk_size):
+        chunk = ids[start:start + chunk_size]
+        try:
+            flush(chunk)
+        except PyMongoError as e:
+            yield {'total': total, 'processed': processed, 'modified': modified,
+                   'next_id': chunk[0], 'error': str(e)}
+            return
+        processed += len(chunk)
+        if processed < total:
+            yield {'total': total, 'processed': processed, 'modified': modified,
+                   'next_id': ids[processed]}
+    yield {'total': total, 'processed': processed, 'modified': modified,
+           'next_id': None, 'done': True}
+
+
+def start_bulk(*args, **kwargs) -> queue.Queue:
+    """Run ``run_bulk`` in a background thread and return its progress queue.
+
+    The run no longer depends on the HTTP response: a client that
+    disconnects only stops receiving progress, the batch still finishes.
+    The last record put on the queue has ``done`` or ``error`` set.
+    """
+    progress: queue.Queue = queue.Queue()
+
+    def work():
+        try:
+            for record in run_bulk(*args, **kwargs):
+                progress.put(record)
+        except Exception as e:
+            progress.put({'error': str(e)})
+
+    threading.Thread(target=work, daemon=True).start()
+    return progress
@@ -0,0 +1,295 @@
+import hashlib
+import hmac
+import math
+import secrets
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from flask import request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from itsdangerous import BadSignature, URLSafeSerializer
+
+STRATEGIES = ('ip', 'user', 'token')
+TOKEN_COOKIE = 'respondent_token'
+MIN_CAPACITY = 10000
+
+
+class BloomFilter:
+    """Bloom filter over strings (no false negatives).
+
+    ``capacity`` is the number of items it is sized for at ``error_rate``;
+    once ``count`` exceeds it the owner should rebuild a larger filter.
+    """
+
+    def __init__(self, capacity: int = 10000, error_rate: float = 0.01,
+                 bits: Optional[bytes] = None, count: int = 0):
+        self.capacity = capacity
+        self.size = int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits else bytearray((self.size + 7) // 8)
+        if len(self.bits) != (self.size + 7) // 8:
+            raise ValueError('Bloom filter bits do not match its capacity')
+        self.count = count
+
+    @property
+    def full(self) -> bool:
+        return self.count > self.capacity
+
+    def _positions(self, item: str):
+        digest = hashlib.sha256(item.encode()).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class ResponseDeduplicator:
+    """Duplicate-submission checks driven by a per-survey fingerprint strategy.
+
+    A survey's ``settings['dedupe_by']`` lists the fingerprint sources to use
+    ('ip', 'user', 'token'); a submission is a duplicate if any of them has
+    been seen before. Surveys without that setting fall back to ['ip'] when
+    ``one_response_per_ip`` is on. Fingerprints are keyed HMACs, so raw IPs
+    and user ids are never stored in responses. Fingerprints of archived
+    responses stay on the survey as ``archive.fingerprints``.
+
+    Each survey has a Bloom filter, cached in memory and persisted to the
+    ``response_filters`` collection together with its capacity; it is
+    rebuilt larger once it fills up. At most ``max_filters`` filters are
+    cached, least recently used first out. Loading and rebuilding happen
+    outside the lock, so a slow survey never stalls submissions to others.
+    A negative answer skips the lookup query entirely; a positive one is
+    confirmed with an indexed query. The insert itself is conditional on
+    the fingerprints being absent, so a stale filter in another worker can
+    never let a duplicate through.
+    """
+
+    def __init__(self, db, secret: str, persist_every: int = 20, max_filters: int = 1000):
+        self.db = db
+        self.persist_every = persist_every
+        self.max_filters = max_filters
+        self._key = secret.encode()
+        self._tokens = URLSafeSerializer(secret, salt='respondent-token')
+        self._filters: OrderedDict = OrderedDict()
+        self._unsaved: Dict[str, int] = {}
+        self._rebuilding = set()
+        self._lock = threading.Lock()
+        db.surveys.create_index('responses.fingerprints')
+        db.surveys.create_index('archive.fingerprints', sparse=True)
+
+    def issue_token(self) -> str:
+        """Create a signed, anonymous respondent token for the 'token' strategy.
+
+        The token is handed out once per browser as an HttpOnly cookie and
+        new tokens are rate limited per IP, so a respondent cannot simply
+        fetch a fresh identity before every submission.
+        """
+        return self._tokens.dumps(secrets.token_urlsafe(16))
+
+    def has_token(self) -> bool:
+        """Whether the request already carries a valid respondent cookie"""
+        try:
+            self._tokens.loads(request.cookies.get(TOKEN_COOKIE, ''))
+            return True
+        except BadSignature:
+            return False
+
+    @staticmethod
+    def strategy(survey: Dict[str, Any]) -> List[str]:
+        settings = survey.get('settings', {})
+        if 'dedupe_by' in settings:
+            return [s for s in settings['dedupe_by'] if s in STRATEGIES]
+        return ['ip'] if settings.get('one_response_per_ip') else []
+
+    def _sign(self, kind: str, value: str) -> str:
+        digest = hmac.new(self._key, f"{kind}:{value}".encode(), hashlib.sha256)
+        return f"{kind}:{digest.hexdigest()[:32]}"
+
+    def fingerprints(self, survey: Dict[str, Any]) -> List[str]:
+        """Fingerprints of the current request under the survey's strategy.
+
+        Raises ValueError if the strategy requires a respondent token and
+        the request does not carry a valid one.
+        """
+        result = []
+        for kind in self.strategy(survey):
+            if kind == 'ip':
+                result.append(self._sign('ip', request.remote_addr))
+            elif kind == 'user':
+                try:
+                    verify_jwt_in_request(optional=True)
+                    user_id = get_jwt_identity()
+                except Exception:
+                    user_id = None
+                if user_id:
+                    result.append(self._sign('user', str(user_id)))
+            elif kind == 'token':
+                try:
+                    token_id = self._tokens.loads(request.cookies.get(TOKEN_COOKIE, ''))
+                except BadSignature:
+                    raise ValueError(
+                        'A respondent token is required; '
+                        'call GET /api/surveys/<id>/respondent-token first'
+                    )
+                result.append(self._sign('token', token_id))
+        return result
+
+    def _legacy_ip(self, survey: Dict[str, Any]) -> Optional[str]:
+        # Responses stored before fingerprinting kept the raw address
+        return request.remote_addr if 'ip' in self.strategy(survey) else None
+
+    def _build(self, survey_id: str, min_capacity: int = MIN_CAPACITY) -> BloomFilter:
+        """Build a filter from the survey's stored fingerprints and persist it.
+
+        The filter is sized for at least twice the current number of
+        fingerprints, so it has room to grow before the next rebuild.
+        """
+        survey = self.db.surveys.find_one(
+            {'_id': ObjectId(survey_id)},
+            {'responses.fingerprints': 1, 'responses.ip_address': 1,
+             'archive.fingerprints': 1, 'archive.ip_addresses': 1}
+        ) or {}
+        archive = survey.get('archive', {})
+        items = list(archive.get('fingerprints', []))
+        ip_addresses = list(archive.get('ip_addresses', []))
+        for response in survey.get('responses', []):
+            items.extend(response.get('fingerprints', []))
+            if response.get('ip_address'):
+                ip_addresses.append(response['ip_address'])
+        items.extend(self._sign('ip', ip) for ip in ip_addresses)
+        bloom = BloomFilter(capacity=max(min_capacity, 2 * len(items)))
+        for item in items:
+            bloom.add(item)
+        self._persist(survey_id, bytes(bloom.bits), bloom.count, bloom.capacity)
+        return bloom
+
+    def _load(self, survey_id: str) -> BloomFilter:
+        stored = self.db.response_filters.find_one({'_id': ObjectId(survey_id)})
+        try:
+            bloom = BloomFilter(
+                capacity=stored['capacity'], bits=stored['bits'], count=stored['count']
+            ) if stored else None
+        except (KeyError, ValueError):
+            # Written by an older layout; rebuild from the responses
+            bloom = None
+        if bloom is None or bloom.full:
+            bloom = self._build(survey_id)
+        return bloom
+
+    def _install(self, survey_id: str, bloom: BloomFilter, replace: bool = False) -> BloomFilter:
+        # Caller holds the lock
+        if not replace and survey_id in self._filters:
+            bloom = self._filters[survey_id]
+        self._filters[survey_id] = bloom
+        self._filters.move_to_end(survey_id)
+        while len(self._filters) > self.max_filters:
+            evicted, _ = self._filters.popitem(last=False)
+            self._unsaved.pop(evicted, None)
+        return bloom
+
+    def _cached(self, survey_id: str) -> Optional[BloomFilter]:
+        # Caller holds the lock
+        bloom = self._filters.get(survey_id)
+        if bloom is not None:
+            self._filters.move_to_end(survey_id)
+        return bloom
+
+    def _filter(self, survey_id: str) -> BloomFilter:
+        with self._lock:
+            bloom = self._cached(survey_id)
+        if bloom is not None:
+            return bloom
+        bloom = self._load(survey_id)
+        with self._lock:
+            return self._install(survey_id, bloom)
+
+    def _persist(self, survey_id: str, bits: bytes, count: int, capacity: int) -> None:
+        self.db.response_filters.update_one(
+            {'_id': ObjectId(survey_id)},
+            {'$set': {'bits': bits, 'count': count, 'capacity': capacity}},
+            upsert=True
+        )
+
+    def is_duplicate(self, survey: Dict[str, Any], fingerprints: List[str]) -> bool:
+        if not fingerprints:
+            return False
+        survey_id = str(survey['_id'])
+        bloom = self._filter(survey_id)
+        with self._lock:
+            maybe_seen = any(fp in bloom for fp in fingerprints)
+        if not maybe_seen:
+            return False
+        # Possible false positive: confirm against the index
+        return self.db.surveys.count_documents(
+            self.seen_filter(survey, fingerprints), limit=1
+        ) > 0
+
+    def seen_filter(self, survey: Dict[str, Any], fingerprints: List[str]) -> Dict[str, Any]:
+        """Query matching the survey if any of the fingerprints was already used"""
+        conditions = [
+            {'responses.fingerprints': {'$in': fingerprints}},
+            {'archive.fingerprints': {'$in': fingerprints}}
+        ]
+        legacy_ip = self._legacy_ip(survey)
+        if legacy_ip:
+            conditions.append({'responses.ip_address': legacy_ip})
+            conditions.append({'archive.ip_addresses': legacy_ip})
+        return {'_id': survey['_id'], '$or': conditions}
+
+    def unseen_filter(self, survey: Dict[str, Any], fingerprints: List[str]) -> Dict[str, Any]:
+        """Query matching the survey only if none of the fingerprints was used"""
+        query = {'_id': survey['_id']}
+        if fingerprints:
+            query['responses.fingerprints'] = {'$nin': fingerprints}
+            query['archive.fingerprints'] = {'$nin': fingerprints}
+            legacy_ip = self._legacy_ip(survey)
+            if legacy_ip:
+                query['responses.ip_address'] = {'$ne': legacy_ip}
+                query['archive.ip_addresses'] = {'$ne': legacy_ip}
+        return query
+
+    def forget(self, survey_ids: List[ObjectId]) -> None:
+        """Drop the filters of deleted surveys, cached and persisted"""
+        with self._lock:
+            for survey_id in survey_ids:
+                self._filters.pop(str(survey_id), None)
+                self._unsaved.pop(str(survey_id), None)
+        self.db.response_filters.delete_many({'_id': {'$in': survey_ids}})
+
+    def record(self, survey_id: str, fingerprints: List[str]) -> None:
+        if not fingerprints:
+            return
+        bloom = self._filter(survey_id)
+        snapshot = None
+        with self._lock:
+            for fp in fingerprints:
+                bloom.add(fp)
+            if bloom.full:
+                # Past capacity the false-positive rate climbs quickly
+                rebuild = survey_id not in self._rebuilding
+                self._rebuilding.add(survey_id)
+            else:
+                rebuild = False
+                self._unsaved[survey_id] = self._unsaved.get(survey_id, 0) + 1
+                if self._unsaved[survey_id] >= self.persist_every:
+                    self._unsaved[survey_id] = 0
+                    snapshot = (bytes(bloom.bits), bloom.count, bloom.capacity)
+        if snapshot:
+            self._persist(survey_id, *snapshot)
+        elif rebuild:
+            try:
+                larger = self._build(survey_id, 4 * bloom.capacity)
+                with self._lock:
+                    self._install(survey_id, larger, replace=True)
+                    self._unsaved[survey_id] = 0
+            finally:
+                with self._lock:
+                    self._rebuilding.discard(survey_id)
@@ -0,0 +1,210 @@
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from bson import ObjectId
+from ..json_provider import dumps
+from .branching import answer_map
+
+
+class SurveyCounters:
+    """Incrementally maintained result counters for a single survey.
+
+    Counters are keyed by question id and then by label, so a delta is just
+    the subset of (question, label) pairs touched since the last flush.
+    """
+
+    def __init__(self, questions: List[Dict[str, Any]]):
+        self.questions = {q['id']: q for q in questions if 'id' in q}
+        self.total = 0
+        self.counts: Dict[str, Dict[str, int]] = {qid: {} for qid in self.questions}
+        self._dirty: Dict[str, set] = {}
+        self._total_dirty = False
+
+    def add(self, response: Dict[str, Any]) -> None:
+        self.total += 1
+        self._total_dirty = True
+        for qid, value in answer_map(response).items():
+            question = self.questions.get(qid)
+            if question is None or value is None or value == '':
+                continue
+            for label in self._labels(question, value):
+                bucket = self.counts[qid]
+                bucket[label] = bucket.get(label, 0) + 1
+                self._dirty.setdefault(qid, set()).add(label)
+
+    @staticmethod
+    def _labels(question: Dict[str, Any], value: Any) -> List[str]:
+        q_type = question.get('type')
+        if q_type in ['multiple_choice', 'dropdown']:
+            values = value if isinstance(value, list) else [value]
+            options = question.get('options') or []
+            return [str(v) for v in values if v in options]
+        if q_type == 'rating':
+            return [str(value)] if str(value).isdigit() else []
+        # Text answers are only counted, never streamed
+        return ['answered']
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'totalResponses': self.total,
+            'questions': {qid: dict(bucket) for qid, bucket in self.counts.items()}
+        }
+
+    def take_delta(self) -> Optional[Dict[str, Any]]:
+        """Return the counters changed since the last call, or None"""
+        if not self._total_dirty and not self._dirty:
+            return None
+        delta = {
+            'totalResponses': self.total,
+            'questions': {
+                qid: {label: self.counts[qid][label] for label in labels}
+                for qid, labels in self._dirty.items()
+            }
+        }
+        self._dirty = {}
+        self._total_dirty = False
+        return delta
+
+
+class _Channel:
+    def __init__(self, counters: SurveyCounters):
+        self.counters = counters
+        self.subscribers: List[queue.Queue] = []
+        self.last_flush = 0.0
+
+
+class ResultsBroker:
+    """In-process pub/sub hub for live survey results.
+
+    Every survey being watched has exactly one channel holding one set of
+    counters, seeded with a single read of the survey document. New
+    submissions update those counters once and the resulting deltas are
+    fanned out to all viewers, at most once per ``min_interval`` seconds.
+
+    Submissions reach the broker either through ``publish`` (called by the
+    submit route) or, when ``use_change_streams`` is set, through a MongoDB
+    change stream on the ``surveys`` collection, which also picks up writes
+    made by other workers.
+    """
+
+    def __init__(self, db, min_interval: float = 1.0, use_change_streams: bool = False):
+        self.db = db
+        self.min_interval = min_interval
+        self.use_change_streams = use_change_streams
+        self._channels: Dict[str, _Channel] = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def _start(self) -> None:
+        if self._started:
+            return
+        self._started = True
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+        if self.use_change_streams:
+            threading.Thread(target=self._watch_loop, daemon=True).start()
+
+    def subscribe(self, survey_id: str) -> Optional[queue.Queue]:
+        """Register a viewer and return its message queue.
+
+        The first message on the queue is always a full snapshot. Returns
+        None if the survey does not exist.
+        """
+        q: queue.Queue = queue.Queue()
+        loaded: Optional[_Channel] = None
+        while True:
+            with self._lock:
+                self._start()
+                channel = self._channels.get(survey_id)
+                if channel is None and loaded is not None:
+                    channel = self._channels[survey_id] = loaded
+                if channel is not None:
+                    channel.subscribers.append(q)
+                    q.put(('snapshot', channel.counters.snapshot()))
+                    return q
+            # The seeding read scans every response, so keep it outside the
+            # lock; a submission stored in the short gap between this read
+            # and the channel being registered is not counted.
+            loaded = self._load_channel(survey_id)
+            if loaded is None:
+                return None
+
+    def unsubscribe(self, survey_id: str, q: queue.Queue) -> None:
+        with self._lock:
+            channel = self._channels.get(survey_id)
+            if channel is None:
+                return
+            if q in channel.subscribers:
+                channel.subscribers.remove(q)
+            if not channel.subscribers:
+                del self._channels[survey_id]
+
+    def publish(self, survey_id: str, response: Dict[str, Any]) -> None:
+        """Feed a newly stored response into the survey's channel.
+
+        A no-op when change streams are the source, so that the submit route
+        can call it unconditionally without double counting.
+        """
+        if self.use_change_streams:
+            return
+        self._apply(survey_id, response)
+
+    def _apply(self, survey_id: str, response: Dict[str, Any]) -> None:
+        with self._lock:
+            channel = self._channels.get(survey_id)
+            if channel is not None:
+                channel.counters.add(response)
+
+    def _load_channel(self, survey_id: str) -> Optional[_Channel]:
+        survey = self.db.surveys.find_one(
+            {'_id': ObjectId(survey_id)},
+            {'questions': 1, 'responses': 1}
+        )
+        if not survey:
+            return None
+        counters = SurveyCounters(survey.get('questions', []))
+        for response in survey.get('responses', []):
+            counters.add(response)
+        counters.take_delta()
+        return _Channel(counters)
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self.min_interval)
+            now = time.monotonic()
+            with self._lock:
+                for channel in self._channels.values():
+                    if now - channel.last_flush < self.min_interval:
+                        continue
+                    delta = channel.counters.take_delta()
+                    if delta is None:
+                        continue
+                    channel.last_flush = now
+                    for q in channel.subscribers:
+                        q.put(('delta', delta))
+
+    def _watch_loop(self) -> None:
+        pipeline = [{'$match': {'operationType': 'update'}}]
+        while True:
+            try:
+                with self.db.surveys.watch(pipeline) as stream:
+                    for change in stream:
+                        survey_id = str(change['documentKey']['_id'])
+                        if survey_id not in self._channels:
+                            continue
+                        fields = change.get('updateDescription', {}).get('updatedFields', {})
+                        for key, value in fields.items():
+                            # $push on an array shows up as 'responses.<index>'
+                            if key.startswith('responses.') and isinstance(value, dict):
+                                self._apply(survey_id, value)
+                            # ...except when the array was empty before the push
+                            elif key == 'responses' and isinstance(value, list):
+                                for response in value:
+                                    self._apply(survey_id, response)
+            except Exception as e:
+                print(f"Live results change stream error: {e}")
+                time.sleep(5)
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {dumps(data).decode()}\n\n"
@@ -0,0 +1,163 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Optional, Tuple, Union
+from flask import current_app, jsonify, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+
+
+class MemoryBackend:
+    """Token buckets kept in process memory (one set per worker).
+
+    At most ``max_keys`` buckets are kept; the least recently used one is
+    evicted first, which at worst lets an idle client start with a full
+    bucket again.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self._buckets: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_keys = max_keys
+
+    def consume(self, key: str, rate: float, capacity: int) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * rate)
+            allowed = tokens >= 1
+            self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return (True, 0.0) if allowed else (False, (1 - tokens) / rate)
+
+
+class RedisBackend:
+    """Token buckets shared by all workers through Redis.
+
+    The refill-and-take step runs as a Lua script so that it is atomic
+    across concurrent workers.
+    """
+
+    SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    local wait = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    else
+        wait = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(wait)}
+    """
+
+    def __init__(self, url: str):
+        import redis
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def consume(self, key: str, rate: float, capacity: int) -> Tuple[bool, float]:
+        allowed, wait = self._script(
+            keys=[f"ratelimit:{key}"],
+            args=[rate, capacity, time.time()]
+        )
+        return bool(allowed), float(wait)
+
+
+def create_backend(name: str, redis_url: Optional[str] = None):
+    if name == 'redis':
+        return RedisBackend(redis_url or 'redis://localhost:6379/0')
+    return MemoryBackend()
+
+
+def _too_many(message: str, retry_after: float, status: int = 429):
+    response = jsonify({'error': message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _scope_key(scope: str) -> Optional[str]:
+    if scope == 'ip':
+        return request.remote_addr
+    if scope == 'user':
+        try:
+            verify_jwt_in_request(optional=True)
+            return get_jwt_identity()
+        except Exception:
+            return None
+    if scope == 'survey':
+        return (request.view_args or {}).get('survey_id')
+    raise ValueError(f"Unknown rate limit scope: {scope}")
+
+
+def check_limit(name: str, limit: Union[int, str], period: int, scope: str = 'ip'):
+    """Take one token from the named bucket for the current request.
+
+    ``limit`` is either a number or the name of an app config key holding
+    it, so deployments can tune limits without code changes. Returns a 429
+    response if the bucket is empty, otherwise None. Use this directly when
+    only some code paths of an endpoint should be counted.
+    """
+    key = _scope_key(scope)
+    if key is None:
+        return None
+    if isinstance(limit, str):
+        limit = current_app.config[limit]
+    allowed, retry_after = current_app.rate_limiter.consume(
+        f"{name}:{scope}:{key}", limit / period, limit
+    )
+    if not allowed:
+        return _too_many('Too many requests, please try again later', retry_after)
+    return None
+
+
+def rate_limit(limit: Union[int, str], period: int = 60, scope: str = 'ip'):
+    """Allow ``limit`` requests per ``period`` seconds for each scope key.
+
+    ``limit`` may name an app config key instead, as in ``check_limit``.
+
+    ``scope`` is one of 'ip', 'user' or 'survey'. Requests without a key for
+    the scope (e.g. anonymous callers on a per-user limit) are not counted.
+    Decorators can be stacked to apply several scopes to one endpoint.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            limited = check_limit(fn.__name__, limit, period, scope)
+            if limited is not None:
+                return limited
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def concurrency_limit(max_concurrent: int, retry_after: int = 1):
+    """Cap in-flight requests to an expensive endpoint within this worker.
+
+    Callers over the cap get an immediate 503 rather than queueing up
+    behind the running requests.
+    """
+    slots = threading.BoundedSemaphore(max_concurrent)
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not slots.acquire(blocking=False):
+                return _too_many('Server is busy, please try again shortly', retry_after, status=503)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                slots.release()
+        return wrapper
+    return decorator
@@ -0,0 +1,142 @@
+from datetime import datetime
+from typing import Any, Dict, List
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from .branching import answer_map, compile_survey
+
+
+class SurveySummaries:
+    """Per-survey dashboard counters kept in the ``survey_summaries`` collection.
+
+    One small document per survey, keyed by the survey's ``_id`` and indexed
+    by ``creator_id``, is updated in place by the routes that create,
+    edit, answer and delete surveys. A creator's dashboard is then an
+    indexed query that only reads survey ids, never the (large) survey
+    documents. A missing summary is backfilled from its survey the first
+    time it is needed.
+    """
+
+    FIELDS = ('title', 'creator_id', 'created_at', 'expires_at', 'is_public')
+
+    # What computing a summary needs from a survey document
+    SOURCE_PROJECTION = {
+        **{field: 1 for field in FIELDS},
+        'questions': 1, 'updated_at': 1,
+        'responses.answers': 1, 'responses.submitted_at': 1,
+        'archive.count': 1, 'archive.analytics': 1, 'archive.last_submission_at': 1
+    }
+
+    def __init__(self, db):
+        self.collection = db.survey_summaries
+        self.surveys = db.surveys
+        self.collection.create_index([('creator_id', ASCENDING), ('created_at', DESCENDING)])
+
+    def _summary_fields(self, survey: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: survey.get(field) for field in self.FIELDS}
+
+    def _compute(self, survey: Dict[str, Any]) -> Dict[str, Any]:
+        """A survey's full summary, counted from its responses and archive entry"""
+        responses = survey.get('responses', [])
+        graph = compile_survey(survey)
+        completed = sum(1 for r in responses if graph.is_complete(answer_map(r)))
+        count = len(responses)
+        archive = survey.get('archive')
+        if archive:
+            analytics = archive.get('analytics', {})
+            count += archive.get('count', 0)
+            completed += round(analytics.get('completionRate', 0) * analytics.get('totalResponses', 0))
+        submitted = [r['submitted_at'] for r in responses if r.get('submitted_at')]
+        fields = self._summary_fields(survey)
+        fields.update({
+            'response_count': count,
+            'completed_count': completed,
+            'last_submission_at': max(submitted) if submitted else (archive or {}).get('last_submission_at')
+        })
+        return fields
+
+    def _backfill(self, survey_id: ObjectId) -> None:
+        """Create a missing summary from the survey, counting what it already holds.
+
+        Surveys created before summaries existed have none; seeding zeros
+        would then be stored as fact.
+        """
+        survey = self.surveys.find_one({'_id': survey_id}, self.SOURCE_PROJECTION)
+        if not survey:
+            return
+        try:
+            self.collection.update_one(
+                {'_id': survey_id}, {'$setOnInsert': self._compute(survey)}, upsert=True
+            )
+        except DuplicateKeyError:
+            # Another request backfilled it first
+            pass
+
+    def upsert_survey(self, survey_id: ObjectId, survey: Dict[str, Any]) -> None:
+        """Refresh the descriptive fields of a survey's summary, creating it if missing"""
+        result = self.collection.update_one({'_id': survey_id}, {'$set': self._summary_fields(survey)})
+        if result.matched_count == 0:
+            self._backfill(survey_id)
+
+    def record_response(self, survey_id: ObjectId, completed: bool, submitted_at: datetime) -> None:
+        """Count a response that has already been stored on the survey"""
+        result = self.collection.update_one(
+            {'_id': survey_id},
+            {
+                '$inc': {'response_count': 1, 'completed_count': 1 if completed else 0},
+                '$max': {'last_submission_at': submitted_at}
+            }
+        )
+        if result.matched_count == 0:
+            # The backfill reads the survey, so it already includes this response
+            self._backfill(survey_id)
+
+    def counts(self, survey_ids: List[ObjectId]) -> Dict[ObjectId, int]:
+        """Response counts of the given surveys, backfilling missing summaries"""
+        found = {
+            summary['_id']: summary.get('response_count', 0)
+            for summary in self.collection.find({'_id': {'$in': survey_ids}}, {'response_count': 1})
+        }
+        for survey_id in survey_ids:
+            if survey_id not in found:
+                self._backfill(survey_id)
+                summary = self.collection.find_one({'_id': survey_id}, {'response_count': 1})
+                found[survey_id] = summary.get('response_count', 0) if summary else 0
+        return found
+
+    def update_many(self, survey_ids: List[ObjectId], fields: Dict[str, Any]) -> None:
+        self.collection.update_many({'_id': {'$in': survey_ids}}, {'$set': fields})
+
+    def remove(self, survey_ids: List[ObjectId]) -> None:
+        self.collection.delete_many({'_id': {'$in': survey_ids}})
+
+    def for_creator(self, creator_id: str) -> List[Dict[str, Any]]:
+        survey_ids = [survey['_id'] for survey in self.surveys.find({'creator_id': creator_id}, {'_id': 1})]
+        self.counts(survey_ids)
+        summaries = []
+        for summary in self.collection.find({'creator_id': creator_id}).sort('created_at', DESCENDING):
+            count = summary.get('response_count', 0)
+            summary['completion_rate'] = summary.get('completed_count', 0) / count if count else 0
+            summaries.append(summary)
+        return summaries
+
+    def rebuild(self, batch_size: int = 500) -> int:
+        """Recompute every summary from the survey documents.
+
+        Missing summaries are also backfilled one at a time as surveys are
+        edited, answered or listed; run this once after upgrading to fill
+        them all up front. Archived responses are taken from the survey's
+        archive entry.
+        """
+        rebuilt = 0
+        ops = []
+        for survey in self.surveys.find({}, self.SOURCE_PROJECTION):
+            ops.append(UpdateOne({'_id': survey['_id']}, {'$set': self._compute(survey)}, upsert=True))
+            if len(ops) >= batch_size:
+                rebuilt += len(ops)
+                self.collection.bulk_write(ops, ordered=False)
+                ops = []
+        if ops:
+            rebuilt += len(ops)
+            self.collection.bulk_write(ops, ordered=False)
+        return rebuilt
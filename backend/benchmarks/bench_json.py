@@ -0,0 +1,55 @@
+"""Serialization throughput benchmark for large survey result payloads.
+
+Compares the BSON-aware JSON provider against the stdlib encoder with the
+per-document ``_id`` conversion the routes used to do by hand.
+
+    cd backend
+    python -m benchmarks.bench_json [num_surveys] [responses_per_survey]
+
+Importing ``app`` creates the application, so MONGODB_URI must be set.
+"""
+import json
+import sys
+import timeit
+from datetime import datetime
+from bson import ObjectId
+from bson.decimal128 import Decimal128
+from app.json_provider import dumps
+
+
+def make_payload(num_surveys: int, responses_per_survey: int) -> list:
+    question_ids = [str(ObjectId()) for _ in range(10)]
+    return [{
+        '_id': ObjectId(),
+        'title': f'Survey {i}',
+        'creator_id': str(ObjectId()),
+        'created_at': datetime.utcnow(),
+        'score': Decimal128('4.25'),
+        'responses': [{
+            'submitted_at': datetime.utcnow(),
+            'respondent': ObjectId(),
+            'answers': [{'questionId': qid, 'value': 'Option A'} for qid in question_ids]
+        } for _ in range(responses_per_survey)]
+    } for i in range(num_surveys)]
+
+
+def stdlib_encode(surveys: list) -> bytes:
+    surveys = [dict(survey, _id=str(survey['_id'])) for survey in surveys]
+    return json.dumps(surveys, default=str).encode()
+
+
+def main() -> None:
+    num_surveys = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    responses_per_survey = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    payload = make_payload(num_surveys, responses_per_survey)
+    size = len(dumps(payload))
+    print(f"{num_surveys} surveys x {responses_per_survey} responses, {size / 1e6:.1f} MB")
+
+    for label, fn in [('json.dumps + _id loop', lambda: stdlib_encode(payload)),
+                      ('BSONJSONProvider dumps', lambda: dumps(payload))]:
+        best = min(timeit.repeat(fn, number=5, repeat=3)) / 5
+        print(f"{label:<28} {best * 1e3:8.2f} ms  {size / best / 1e6:8.1f} MB/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Microbenchmark for Survey/Question loading and serialization.
+
+Compares the slot-based ``from_dict`` fast path against the previous
+construct-then-overwrite approach, and ``to_json`` against ``json.dumps``
+on ``to_dict`` output, for a survey with a large question list.
+
+    cd backend
+    python -m benchmarks.bench_models [num_questions]
+
+Importing ``app`` creates the application, so MONGODB_URI must be set.
+"""
+import json
+import sys
+import timeit
+from datetime import datetime
+from bson import ObjectId
+from app.models.survey import Survey, Question
+
+
+def make_survey_doc(num_questions: int) -> dict:
+    return {
+        'id': str(ObjectId()),
+        'title': 'Benchmark survey',
+        'description': 'Large question list',
+        'creator_id': str(ObjectId()),
+        'questions': [{
+            'id': str(ObjectId()),
+            'type': 'multiple_choice',
+            'text': f'Question {i}',
+            'options': ['A', 'B', 'C', 'D'],
+            'required': i % 2 == 0,
+            'order': i,
+            'branch_logic': {}
+        } for i in range(num_questions)],
+        'created_at': datetime.utcnow(),
+        'updated_at': datetime.utcnow(),
+        'expires_at': None,
+        'is_public': True,
+        'shareable_link': str(ObjectId()),
+        'responses': [],
+        'collaborators': [],
+        'settings': {'allow_anonymous': True}
+    }
+
+
+def legacy_from_dict(data: dict) -> Survey:
+    """The old loading path: run __init__, then overwrite every field"""
+    survey = Survey(data['title'], data['description'], data['creator_id'])
+    survey.id = data.get('id', str(ObjectId()))
+    questions = []
+    for q in data.get('questions', []):
+        question = Question(q['type'], q['text'], q.get('options'),
+                            q.get('required', False), q.get('order', 0))
+        question.id = q.get('id', str(ObjectId()))
+        question.branch_logic = q.get('branch_logic', {})
+        questions.append(question)
+    survey.questions = questions
+    survey.created_at = data.get('created_at', datetime.utcnow())
+    survey.updated_at = data.get('updated_at', datetime.utcnow())
+    survey.expires_at = data.get('expires_at')
+    survey.is_public = data.get('is_public', True)
+    survey.shareable_link = data.get('shareable_link', str(ObjectId()))
+    survey.responses = data.get('responses', [])
+    survey.collaborators = data.get('collaborators', [])
+    survey.settings = data.get('settings', {})
+    return survey
+
+
+def bench(label: str, fn, number: int) -> None:
+    best = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print(f"{label:<32} {best * 1e3:8.3f} ms")
+
+
+def main() -> None:
+    num_questions = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    doc = make_survey_doc(num_questions)
+    survey = Survey.from_dict(doc)
+    print(f"{num_questions} questions")
+
+    bench('from_dict (legacy)', lambda: legacy_from_dict(doc), 20)
+    bench('from_dict (slots fast path)', lambda: Survey.from_dict(doc), 20)
+    bench('json.dumps(to_dict())', lambda: json.dumps(survey.to_dict(), default=str).encode(), 20)
+    bench('to_json()', survey.to_json, 20)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,11 @@
+import os
 from app import app
 
 if __name__ == '__main__':
+    # Opt-in background archival; the debug reloader's child is the serving process
+    archive_interval = os.getenv('ARCHIVE_INTERVAL_HOURS')
+    if archive_interval and os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        app.response_archiver.start(float(archive_interval) * 3600)
     try:
         app.run(host='0.0.0.0', port=5000, debug=True)
     except Exception as e:
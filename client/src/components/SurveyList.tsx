@@ -1,11 +1,12 @@
 import React, { useState, useEffect } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { surveyApi } from '../services/api';
-import { Survey } from '../types/survey';
+import { Survey, SurveySummary } from '../types/survey';
 import { useAuth } from '../contexts/AuthContext';
 
 const SurveyList = () => {
   const [surveys, setSurveys] = useState<Survey[]>([]);
+  const [summaries, setSummaries] = useState<Record<string, SurveySummary>>({});
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
   const { user, isAuthenticated } = useAuth();
@@ -14,8 +15,14 @@ const SurveyList = () => {
   useEffect(() => {
     const fetchSurveys = async () => {
       try {
-        const data = await surveyApi.getSurveys();
+        // Survey listings exclude responses but carry a response count; the
+        // user's own surveys get full dashboard summaries
+        const [data, dashboard] = await Promise.all([
+          surveyApi.getSurveys(),
+          isAuthenticated ? surveyApi.getDashboard() : Promise.resolve([])
+        ]);
         setSurveys(data);
+        setSummaries(Object.fromEntries(dashboard.map(s => [s._id, s])));
       } catch (err: any) {
         setError(err.response?.data?.error || 'Failed to load surveys');
       } finally {
@@ -24,7 +31,7 @@ const SurveyList = () => {
     };
 
     fetchSurveys();
-  }, []);
+  }, [isAuthenticated]);
 
   const handleDelete = async (surveyId: string) => {
     if (!window.confirm('Are you sure you want to delete this survey?')) {
@@ -78,7 +85,19 @@ const SurveyList = () => {
                 {survey.expires_at && (
                   <span>Expires: {new Date(survey.expires_at).toLocaleDateString()}</span>
                 )}
-                <span>Responses: {survey.responses.length}</span>
+                {summaries[survey._id] ? (
+                  <>
+                    <span>Responses: {summaries[survey._id].response_count}</span>
+                    <span>Completion: {Math.round(summaries[survey._id].completion_rate * 100)}%</span>
+                    {summaries[survey._id].last_submission_at && (
+                      <span>
+                        Last response: {new Date(summaries[survey._id].last_submission_at as Date).toLocaleDateString()}
+                      </span>
+                    )}
+                  </>
+                ) : (
+                  <span>Responses: {survey.response_count ?? 0}</span>
+                )}
               </div>
 
               <div className="survey-actions">
@@ -102,12 +121,14 @@ const SurveyList = () => {
                     <button onClick={() => navigate(`/survey/${survey._id}`)}>
                       Take Survey
                     </button>
-                    {survey.settings.showResults && survey.responses.length > 0 && (
+                    {survey.settings.showResults && (survey.response_count ?? 0) > 0 && (
                       <button onClick={() => navigate(`/results/${survey._id}`)}>
                         View Results
                       </button>
                     )}
                   </>
+                ) : (
+                  <span>Responses: {survey.response_count ?? 0}</span>
                 )}
               </div>
 
@@ -21,6 +21,11 @@ const TakeSurvey = () => {
         if (!id) throw new Error('Survey ID is required');
         const data = await surveyApi.getSurvey(id);
         setSurvey(data);
+
+        // Surveys deduplicated by token need the respondent cookie before submitting
+        if (data.settings?.dedupe_by?.includes('token')) {
+          await surveyApi.getRespondentToken(id);
+        }
         
         // Check if survey has expired
         if (data.expires_at && new Date(data.expires_at) < new Date()) {
@@ -154,12 +159,26 @@ const TakeSurvey = () => {
     );
   }
 
-  const visibleQuestions = survey.questions.filter(question => {
-    if (!question.branchLogic) return true;
-    
-    const dependentAnswer = answers[question.branchLogic.showQuestionId || ''];
-    return dependentAnswer === question.branchLogic.value;
-  });
+  // Branch logic sits on the controlling question and names the question it reveals
+  const revealedBy = (id: string) =>
+    survey.questions.filter(q => q.id !== id && q.branchLogic?.showQuestionId === id);
+
+  // Same rule as the server: a rule is ignored if its target leads back to its owner
+  const leadsTo = (fromId: string, toId: string, seen: Set<string> = new Set()): boolean => {
+    if (fromId === toId) return true;
+    if (seen.has(fromId)) return false;
+    seen.add(fromId);
+    const next = survey.questions.find(q => q.id === fromId)?.branchLogic?.showQuestionId;
+    return !!next && leadsTo(next, toId, seen);
+  };
+
+  const isVisible = (question: Question): boolean => {
+    const owners = revealedBy(question.id).filter(owner => !leadsTo(question.id, owner.id));
+    if (owners.length === 0) return true;
+    return owners.some(owner => isVisible(owner) && answers[owner.id] === owner.branchLogic?.value);
+  };
+
+  const visibleQuestions = survey.questions.filter(isVisible);
 
   return (
     <div className="take-survey">
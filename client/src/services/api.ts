@@ -1,5 +1,5 @@
 import axios from 'axios';
-import { Survey, SurveyResponse, SurveyResults, SurveyTemplate, SurveyAnalytics } from '../types/survey';
+import { Survey, SurveyResponse, SurveyResults, SurveyTemplate, SurveyAnalytics, SurveySummary } from '../types/survey';
 import { LoginCredentials, RegisterData, AuthResponse, ResetPasswordData, ChangePasswordData } from '../types/auth';
 
 const API_BASE_URL = 'http://localhost:5000/api';
@@ -79,6 +79,11 @@ export const surveyApi = {
     return response.data;
   },
 
+  getDashboard: async (): Promise<SurveySummary[]> => {
+    const response = await api.get('/api/me/dashboard');
+    return response.data;
+  },
+
   getSurvey: async (id: string) => {
     const response = await api.get(`/api/surveys/${id}`);
     return response.data;
@@ -99,6 +104,11 @@ export const surveyApi = {
     return res.data;
   },
 
+  getRespondentToken: async (surveyId: string): Promise<{ issued: boolean }> => {
+    const response = await api.get(`/api/surveys/${surveyId}/respondent-token`);
+    return response.data;
+  },
+
   getSurveyResults: async (id: string): Promise<SurveyResults> => {
     const response = await api.get(`/api/surveys/${id}/results`);
     return response.data;
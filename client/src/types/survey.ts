@@ -30,6 +30,7 @@ export interface SurveySettings {
   oneResponsePerIp: boolean;
   showResults: boolean;
   customThankYou: string;
+  dedupe_by?: ('ip' | 'user' | 'token')[];
 }
 
 export interface Survey {
@@ -43,11 +44,25 @@ export interface Survey {
   expires_at?: Date;
   is_public: boolean;
   shareable_link: string;
-  responses: SurveyResponse[];
+  responses?: SurveyResponse[];  // omitted from survey listings
+  response_count?: number;  // set on survey listings
   collaborators: string[];
   settings: SurveySettings;
 }
 
+export interface SurveySummary {
+  _id: string;
+  title: string;
+  creator_id: string;
+  created_at: Date;
+  expires_at?: Date;
+  is_public: boolean;
+  response_count: number;
+  completed_count: number;
+  completion_rate: number;
+  last_submission_at?: Date;
+}
+
 export interface SurveyTemplate extends Survey {
   category?: string;
   tags?: string[];